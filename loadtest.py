@@ -0,0 +1,241 @@
+"""Generador de carga asíncrono que reproduce sesiones de almacén.
+
+Uso:
+    python loadtest.py -c 20 -d 30                              # ASGI en proceso
+    python loadtest.py --url http://localhost:8000 -c 50 -d 60  # uvicorn local
+"""
+import argparse, asyncio, csv, io, json, math, random, time
+from collections import defaultdict
+
+import httpx
+
+SEARCH_TERMS = ["vestido", "top", "falda", "blusa", "short", "bikini", "chaqueta"]
+COLORES = ["Blanco", "Negro", "Rojo", "Azul", "Verde"]
+TALLAS = ["XS", "S", "M", "L", "XL"]
+SESSIONS = ("search", "cart", "match")
+
+
+def percentile(values, p):
+    """Percentil por rango más cercano (p en 0-100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = max(0, math.ceil(p / 100 * len(ordered)) - 1)
+    return ordered[min(k, len(ordered) - 1)]
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)  # endpoint -> segundos
+        self.errors = defaultdict(int)
+
+    async def timed(self, client, endpoint, method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        self.latencies[endpoint].append(time.perf_counter() - start)
+        if response is None or response.status_code >= 400:
+            self.errors[endpoint] += 1
+            return None
+        return response
+
+    def report(self, elapsed):
+        ms = lambda v: round(v * 1000, 2)
+        rows = []
+        for endpoint in sorted(self.latencies):
+            lat = self.latencies[endpoint]
+            rows.append({
+                "endpoint": endpoint,
+                "requests": len(lat),
+                "errors": self.errors[endpoint],
+                "rps": round(len(lat) / elapsed, 2) if elapsed else None,
+                "p50_ms": ms(percentile(lat, 50)),
+                "p95_ms": ms(percentile(lat, 95)),
+                "p99_ms": ms(percentile(lat, 99)),
+                "max_ms": ms(max(lat)),
+            })
+        return rows
+
+
+# --------- Datos sintéticos -----------
+def variant(i):
+    return f"REF{i:04d}", COLORES[i % len(COLORES)], TALLAS[i % len(TALLAS)]
+
+def catalog_csv(rows):
+    buff = io.StringIO()
+    writer = csv.writer(buff)
+    writer.writerow(["Referencia", "EAN", "Nombre", "Color", "Talla"])
+    for i in range(rows):
+        ref, color, talla = variant(i)
+        writer.writerow([f"[{ref}]({color}, {talla})", f"84{i:011d}", f"Producto {i}", color, talla])
+    return buff.getvalue().encode()
+
+def request_csv(rng, rows, catalog_rows):
+    buff = io.StringIO()
+    writer = csv.writer(buff)
+    writer.writerow(["Producto", "Descripcion", "Cantidad"])
+    for _ in range(rows):
+        # ~10% de líneas fuera de catálogo para que haya "no_encontrado"
+        ref, color, talla = variant(rng.randrange(int(catalog_rows * 1.1)))
+        writer.writerow([f"[{ref}]({color}, {talla})", "", rng.randint(1, 12)])
+    return buff.getvalue().encode()
+
+
+# --------- Sesiones -----------
+async def pause(rng, think, low, high):
+    if think > 0:
+        await asyncio.sleep(rng.uniform(low, high) * think)
+
+async def search_session(client, stats, rng, ctx):
+    """Ráfaga de tecleo: una búsqueda por cada letra a partir de la segunda."""
+    term = rng.choice(SEARCH_TERMS)
+    for i in range(2, len(term) + 1):
+        await stats.timed(client, "/products/search", "GET", "/products/search", params={"q": term[:i]})
+        await pause(rng, ctx["think"], 0.05, 0.2)
+
+async def cart_session(client, stats, rng, ctx):
+    lines = []
+    for _ in range(rng.randint(1, 6)):
+        ref, color, talla = variant(rng.randrange(ctx["catalog_rows"]))
+        line = {"ref": ref, "color": color, "talla": talla, "qty": rng.randint(1, 5)}
+        if await stats.timed(client, "/cart/add", "POST", "/cart/add", json=line):
+            lines.append(line)
+        await pause(rng, ctx["think"], 0.5, 2.0)
+    await stats.timed(client, "/cart/view", "GET", "/cart/view")
+    await pause(rng, ctx["think"], 1.0, 3.0)
+    await stats.timed(client, "/cart/checkout", "GET", "/cart/checkout", params={
+        "format": rng.choice(["csv", "xlsx"]),
+        "origin": "Central",
+        "destination": f"Tienda {rng.randint(1, 50)}",
+        "fecha": time.strftime("%Y-%m-%d"),
+        "pedido_ref": f"LT-{rng.randrange(10**6)}",
+    })
+    # El carrito es compartido: se deja como estaba para no crecer sin límite
+    for line in lines:
+        await stats.timed(client, "/cart/remove", "POST", "/cart/remove", json=line)
+
+async def match_session(client, stats, rng, ctx):
+    content = request_csv(rng, ctx["request_rows"], ctx["catalog_rows"])
+    files = {"file": ("peticion.csv", content, "text/csv")}
+    response = await stats.timed(client, "/request/upload", "POST", "/request/upload", files=files)
+    if response is None:
+        return
+    body = {"catalog_id": ctx["catalog_id"], "request_id": response.json()["request_id"]}
+    response = await stats.timed(client, "/match", "POST", "/match", json=body)
+    if response is None:
+        return
+    await pause(rng, ctx["think"], 1.0, 3.0)
+    match_id = response.json()["match_id"]
+    await stats.timed(
+        client, "/match/{match_id}/export", "GET", f"/match/{match_id}/export",
+        params={"format": rng.choice(["csv", "xlsx"]), "type": rng.choice(["all", "missing"])},
+    )
+
+SESSION_FUNCS = {"search": search_session, "cart": cart_session, "match": match_session}
+
+
+# --------- Ejecución -----------
+def parse_mix(value):
+    """'search=6,cart=3,match=1' -> {"search": 6.0, ...}"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SESSION_FUNCS:
+            raise argparse.ArgumentTypeError(f"Sesión desconocida: {name} ({'|'.join(SESSIONS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+def make_client(url, concurrency):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    if url:
+        return httpx.AsyncClient(base_url=url, limits=limits, timeout=60)
+    from main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=60)
+
+async def wait_ready(client, url, timeout=120):
+    if not url:
+        # ASGITransport no ejecuta el lifespan: se lanza la carga a mano
+        from main import start_catalog_warmup
+        await start_catalog_warmup()
+        return
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/health/ready")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError(f"{url} no está listo tras {timeout}s")
+
+async def run(url=None, concurrency=10, duration=30.0, mix=None, think=1.0,
+              catalog_rows=2000, request_rows=200, seed=None):
+    mix = mix or {"search": 6, "cart": 3, "match": 1}
+    names, weights = list(mix), list(mix.values())
+    stats = Stats()
+    master = random.Random(seed)
+    async with make_client(url, concurrency) as client:
+        await wait_ready(client, url)
+        files = {"file": ("catalogo.csv", catalog_csv(catalog_rows), "text/csv")}
+        response = await client.post("/catalog/upload", files=files)
+        response.raise_for_status()
+        ctx = {
+            "catalog_id": response.json()["catalog_id"],
+            "catalog_rows": catalog_rows,
+            "request_rows": request_rows,
+            "think": think,
+        }
+
+        start = time.monotonic()
+        deadline = start + duration
+
+        async def worker(rng):
+            while time.monotonic() < deadline:
+                session = rng.choices(names, weights)[0]
+                await SESSION_FUNCS[session](client, stats, rng, ctx)
+
+        await asyncio.gather(*(worker(random.Random(master.random())) for _ in range(concurrency)))
+        elapsed = time.monotonic() - start
+    return stats.report(elapsed)
+
+def format_report(rows):
+    headers = ["endpoint", "requests", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+    table = [headers] + [[str(r[h]) for h in headers] for r in rows]
+    widths = [max(len(line[i]) for line in table) for i in range(len(headers))]
+    return "\n".join(
+        "  ".join(cell.ljust(w) if i == 0 else cell.rjust(w) for i, (cell, w) in enumerate(zip(line, widths)))
+        for line in table
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de sesiones de almacén")
+    parser.add_argument("--url", help="Servidor a probar (por defecto, la app ASGI en proceso)")
+    parser.add_argument("-c", "--concurrency", type=int, default=10, help="Sesiones simultáneas (tiendas)")
+    parser.add_argument("-d", "--duration", type=float, default=30.0, help="Duración en segundos")
+    parser.add_argument("--mix", type=parse_mix, default=None, help="Pesos de sesión, p.ej. search=6,cart=3,match=1")
+    parser.add_argument("--think", type=float, default=1.0, help="Factor de pausas entre acciones (0 = sin pausas)")
+    parser.add_argument("--catalog-rows", type=int, default=2000, help="Filas del catálogo sintético para /match")
+    parser.add_argument("--request-rows", type=int, default=200, help="Filas de cada petición subida")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="Salida en JSON")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(
+        url=args.url,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        mix=args.mix,
+        think=args.think,
+        catalog_rows=args.catalog_rows,
+        request_rows=args.request_rows,
+        seed=args.seed,
+    ))
+    print(json.dumps(rows, indent=2) if args.json else format_report(rows))
+    if any(r["errors"] for r in rows):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
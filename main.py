@@ -1,17 +1,30 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import StreamingResponse, FileResponse
+from __future__ import annotations
+
+from fastapi import FastAPI, UploadFile, File, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse, FileResponse, JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
-import pandas as pd
-import uuid, re, io
+import uuid, re, io, time, asyncio, threading, hashlib
+import orjson
 from pathlib import Path
-import openpyxl
 from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+
+# pandas y openpyxl se importan bajo demanda para que el arranque sea rápido
+if TYPE_CHECKING:
+    import pandas as pd
 
 # Estado en memoria
 catalog_df = None
 catalog_loaded = False
+catalog_index = {}  # key: (ref,color,talla) -> {"ean": ..., "nombre": ...}
+catalog_version = None  # cambia con el fichero de catálogo; base de los ETag
+catalog_status = {"status": "pending", "stage": None, "rows": None, "version": None, "error": None, "elapsed": None}
+_catalog_lock = threading.Lock()
+_catalog_started = None  # time.monotonic() del inicio de la carga
+_catalog_warmup = None  # asyncio.Task de la carga en segundo plano
 catalog_path_default = Path("catalogue.xlsx")
 plantilla_path_default = Path("plantilla_pedido.xlsx")  # provisional
 catalogs = {}
@@ -19,6 +32,9 @@ requests_store = {}
 matches = {}
 cart = {}  # key: (ref,color,talla) -> qty
 
+# Respuestas más pequeñas no compensan el coste de comprimir
+GZIP_MINIMUM_SIZE = 1024
+
 REF_PATTERN = re.compile(r"\[([^\]]+)\]")
 PAREN_PATTERN = re.compile(r"\(([^)]*)\)")
 
@@ -39,6 +55,7 @@ def parse_ref(ref_str):
     return {"ref": ref, "color": color, "talla": talla}
 
 def read_table(uploaded: UploadFile) -> pd.DataFrame:
+    import pandas as pd
     name = uploaded.filename.lower()
     content = uploaded.file.read()
     if name.endswith(".csv"):
@@ -53,6 +70,7 @@ def read_table(uploaded: UploadFile) -> pd.DataFrame:
     return df
 
 def load_catalog_file(path: Path) -> pd.DataFrame:
+    import pandas as pd
     if not path.exists():
         raise FileNotFoundError(f"No se encontró catalogue.xlsx en {path}")
     cat = pd.read_excel(path)
@@ -70,13 +88,90 @@ def load_catalog_file(path: Path) -> pd.DataFrame:
     cat["_nombre"] = cat.get("Nombre", None)
     return cat
 
+def build_catalog_index(cat: pd.DataFrame) -> dict:
+    """Índice (ref, color, talla) -> primera variante, para el carrito."""
+    import pandas as pd
+    index = {}
+    nombres = cat["_nombre"] if "_nombre" in cat.columns else [None] * len(cat)
+    for ref, color, talla, ean, nombre in zip(cat["_ref"], cat["_color"], cat["_talla"], cat["_ean"], nombres):
+        # Igual que la comparación con ==, un valor nulo nunca coincide
+        if pd.isna(ref) or pd.isna(color) or pd.isna(talla):
+            continue
+        index.setdefault((ref, color, talla), {"ean": ean, "nombre": nombre})
+    return index
+
 def ensure_catalog_loaded():
-    global catalog_df, catalog_loaded
-    if not catalog_loaded:
-        catalog_df = load_catalog_file(catalog_path_default)
+    global catalog_df, catalog_loaded, catalog_index, catalog_version, _catalog_started
+    if catalog_loaded:
+        return
+    with _catalog_lock:
+        if catalog_loaded:
+            return
+        _catalog_started = time.monotonic()
+        catalog_status.update(status="loading", stage="import", error=None, elapsed=None)
+        try:
+            import pandas  # noqa: F401
+            import openpyxl  # noqa: F401
+            catalog_status["stage"] = "read"
+            cat = load_catalog_file(catalog_path_default)
+            stat = catalog_path_default.stat()
+            catalog_status.update(stage="index", rows=len(cat))
+            cat["_ref_lc"] = cat["_ref"].str.lower()
+            cat["_nombre_lc"] = cat["_nombre"].fillna("").str.lower()
+            index = build_catalog_index(cat)
+        except Exception as exc:
+            catalog_status.update(status="error", error=str(exc), elapsed=_catalog_elapsed())
+            raise
+        catalog_df, catalog_index = cat, index
+        catalog_version = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
         catalog_loaded = True
+        catalog_status.update(status="ready", stage=None, version=catalog_version, elapsed=_catalog_elapsed())
+
+def _catalog_elapsed():
+    if _catalog_started is None:
+        return None
+    return round(time.monotonic() - _catalog_started, 3)
+
+def start_catalog_warmup() -> asyncio.Task:
+    """Lanza la carga del catálogo en un hilo sin bloquear el event loop."""
+    global _catalog_warmup
+    if _catalog_warmup is None or (_catalog_warmup.done() and not catalog_loaded):
+        _catalog_warmup = asyncio.create_task(asyncio.to_thread(ensure_catalog_loaded))
+    return _catalog_warmup
+
+async def require_catalog():
+    if catalog_loaded:
+        return
+    try:
+        await asyncio.shield(start_catalog_warmup())
+    except Exception as exc:
+        raise HTTPException(503, f"Catálogo no disponible: {exc}")
+
+def _json_default(obj):
+    # Timestamp, Timedelta y demás tipos de pandas que orjson no conoce
+    return obj.isoformat() if hasattr(obj, "isoformat") else str(obj)
+
+class FastJSONResponse(ORJSONResponse):
+    """JSON con orjson para cargas derivadas de DataFrames (numpy, NaN, fechas)."""
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_json_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
 
 def _export_df(df: pd.DataFrame, fmt: str, filename: str) -> StreamingResponse:
+    import pandas as pd
     if fmt == "csv":
         buff = io.StringIO()
         df.to_csv(buff, index=False)
@@ -111,13 +206,16 @@ class CartLine(BaseModel):
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    ensure_catalog_loaded()
+    # Startup: el catálogo se carga en segundo plano, ver /health/ready
+    task = start_catalog_warmup()
     yield
-    # Shutdown (if needed in the future)
+    # Shutdown
+    if not task.done():
+        task.cancel()
 
 app = FastAPI(title="Asistente Peticiones Almacenes", lifespan=lifespan)
 
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=6)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -126,6 +224,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# --------- Salud -----------
+@app.get("/health/live")
+async def health_live():
+    return {"status": "ok"}
+
+@app.get("/health/ready")
+async def health_ready():
+    body = dict(catalog_status)
+    if body["status"] == "loading":
+        body["elapsed"] = _catalog_elapsed()
+    return JSONResponse(body, status_code=200 if catalog_loaded else 503)
+
 # --------- Importación ventas (independiente) -----------
 @app.post("/catalog/upload")
 async def upload_catalog(file: UploadFile = File(...)):
@@ -184,13 +294,13 @@ async def do_match(body: MatchRequest):
     not_found = merged[merged["_ean"].isna()].copy()
     mid = uuid.uuid4().hex[:12]
     matches[mid] = {"merged": merged, "not_found": not_found}
-    return {
+    return FastJSONResponse({
         "match_id": mid,
         "total": len(merged),
         "encontrados": int(merged["_ean"].notna().sum()),
         "no_encontrados": int(not_found.shape[0]),
         "preview": merged.head(20).fillna("").to_dict(orient="records"),
-    }
+    })
 
 @app.get("/match/{match_id}/export")
 async def export_match(match_id: str, format: str = "xlsx", type: str = "all"):
@@ -204,31 +314,29 @@ async def export_match(match_id: str, format: str = "xlsx", type: str = "all"):
 
 # --------- Búsqueda catálogo -----------
 @app.get("/products/search")
-async def search_products(q: str):
-    ensure_catalog_loaded()
+async def search_products(q: str, request: Request):
+    await require_catalog()
+    etag = f'W/"{catalog_version}-{hashlib.sha1(q.encode()).hexdigest()[:16]}"'
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
     q_lower = q.lower()
-    mask = catalog_df["_ref"].str.lower().str.contains(q_lower, na=False)
-    if "_nombre" in catalog_df.columns and catalog_df["_nombre"] is not None:
-        mask = mask | catalog_df["_nombre"].fillna("").str.lower().str.contains(q_lower, na=False)
-    found = catalog_df[mask].copy()
+    mask = catalog_df["_ref_lc"].str.contains(q_lower, na=False, regex=False)
+    mask = mask | catalog_df["_nombre_lc"].str.contains(q_lower, na=False, regex=False)
+    found = catalog_df[mask]
     results = {}
-    for _, row in found.iterrows():
-        ref = row["_ref"]
-        nombre = row.get("_nombre", None)
+    for ref, nombre, color, talla, ean in zip(
+        found["_ref"], found["_nombre"], found["_color"], found["_talla"], found["_ean"]
+    ):
         key = (ref, nombre)
         if key not in results:
             results[key] = {"ref": ref, "nombre": nombre, "variantes": []}
-        results[key]["variantes"].append({
-            "color": row["_color"],
-            "talla": row["_talla"],
-            "ean": row["_ean"],
-        })
-    return list(results.values())
+        results[key]["variantes"].append({"color": color, "talla": talla, "ean": ean})
+    return FastJSONResponse(list(results.values()), headers={"ETag": etag, "Cache-Control": "no-cache"})
 
 # --------- Carrito manual -----------
 @app.post("/cart/add")
 async def cart_add(line: CartLine):
-    ensure_catalog_loaded()
+    await require_catalog()
     key = (line.ref, line.color, line.talla)
     cart[key] = cart.get(key, 0) + line.qty
     if cart[key] <= 0:
@@ -246,16 +354,12 @@ async def cart_remove(line: CartLine):
 
 @app.get("/cart/view")
 async def cart_view():
-    ensure_catalog_loaded()
+    await require_catalog()
     rows = []
     for (ref, color, talla), qty in cart.items():
-        row = catalog_df[
-            (catalog_df["_ref"] == ref)
-            & (catalog_df["_color"] == color)
-            & (catalog_df["_talla"] == talla)
-        ]
-        ean = row["_ean"].iloc[0] if len(row) else None
-        nombre = row["_nombre"].iloc[0] if len(row) and "_nombre" in row.columns else None
+        variant = catalog_index.get((ref, color, talla), {})
+        ean = variant.get("ean")
+        nombre = variant.get("nombre")
         rows.append({
             "ref": ref,
             "color": color,
@@ -264,7 +368,7 @@ async def cart_view():
             "qty": qty,
             "nombre": nombre,
         })
-    return {"items": rows}
+    return FastJSONResponse({"items": rows})
 
 # --------- Checkout con metadatos y plantilla -----------
 @app.get("/cart/checkout")
@@ -275,15 +379,12 @@ async def cart_checkout(
     fecha: str = "",
     pedido_ref: str = ""
 ):
-    ensure_catalog_loaded()
+    import pandas as pd
+    import openpyxl
+    await require_catalog()
     data = []
     for (ref, color, talla), qty in cart.items():
-        row = catalog_df[
-            (catalog_df["_ref"] == ref)
-            & (catalog_df["_color"] == color)
-            & (catalog_df["_talla"] == talla)
-        ]
-        ean = row["_ean"].iloc[0] if len(row) else None
+        ean = catalog_index.get((ref, color, talla), {}).get("ean")
         data.append({
             "Origen": origin,
             "Destino": destination,
@@ -334,7 +435,12 @@ async def cart_checkout(
 # Serves index.html and other assets from static/ directory on port 8000
 
 @app.get("/", include_in_schema=False)
-async def serve_index():
-    return FileResponse(Path(__file__).parent / "static" / "index.html")
+async def serve_index(request: Request):
+    index_path = Path(__file__).parent / "static" / "index.html"
+    response = FileResponse(index_path, stat_result=index_path.stat(), headers={"Cache-Control": "no-cache"})
+    etag = response.headers["etag"]
+    if _etag_matches(request, etag):
+        return _not_modified(etag)
+    return response
 
 app.mount("/", StaticFiles(directory=Path(__file__).parent / "static", html=True), name="static")
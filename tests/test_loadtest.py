@@ -0,0 +1,37 @@
+import pytest
+
+from loadtest import percentile, parse_mix, run
+
+
+def test_percentile():
+    """Test nearest-rank percentiles"""
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile(values, 99) == 99
+    assert percentile([7], 99) == 7
+    assert percentile([], 50) is None
+
+
+def test_parse_mix():
+    """Test session weight parsing"""
+    assert parse_mix("search=6,cart=3,match=1") == {"search": 6.0, "cart": 3.0, "match": 1.0}
+    assert parse_mix("cart") == {"cart": 1.0}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("session, endpoints", [
+    ("search", ["/products/search"]),
+    ("cart", ["/cart/add", "/cart/view", "/cart/checkout", "/cart/remove"]),
+    ("match", ["/request/upload", "/match", "/match/{match_id}/export"]),
+])
+async def test_run_in_process(session, endpoints):
+    """Test a short in-process run of each session type reports every endpoint"""
+    rows = await run(concurrency=2, duration=0.01, mix={session: 1}, think=0,
+                     catalog_rows=50, request_rows=10, seed=1)
+    by_endpoint = {r["endpoint"]: r for r in rows}
+    assert sorted(by_endpoint) == sorted(endpoints)
+    for r in rows:
+        assert r["errors"] == 0
+        assert r["requests"] > 0
+        assert r["p50_ms"] <= r["p95_ms"] <= r["p99_ms"] <= r["max_ms"]
@@ -294,3 +294,81 @@ async def test_cart_add_negative_quantity(client: AsyncClient):
     matching_item = [item for item in items if item["ref"] == "REF001"]
     if matching_item:
         assert matching_item[0]["qty"] == 2
+
+
+@pytest.mark.asyncio
+async def test_health_live(client: AsyncClient):
+    """Test liveness endpoint responds without waiting for the catalog"""
+    response = await client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
+
+
+@pytest.mark.asyncio
+async def test_health_ready(client: AsyncClient):
+    """Test readiness endpoint reports the catalog once loaded"""
+    from main import start_catalog_warmup
+
+    await start_catalog_warmup()
+    response = await client.get("/health/ready")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "ready"
+    assert data["rows"] > 0
+
+
+@pytest.mark.asyncio
+async def test_search_products_etag(client: AsyncClient):
+    """Test search returns an ETag and answers 304 when it still matches"""
+    response = await client.get("/products/search?q=vestido")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    cached = await client.get("/products/search?q=vestido", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    other = await client.get("/products/search?q=falda", headers={"If-None-Match": etag})
+    assert other.status_code == 200
+    assert other.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_search_products_gzip(client: AsyncClient):
+    """Test large responses are gzip-compressed and small ones are not"""
+    response = await client.get("/products/search?q=vestido", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert isinstance(response.json(), list)
+
+    small = await client.get("/health/live", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+@pytest.mark.asyncio
+async def test_serve_index_etag(client: AsyncClient):
+    """Test the index page answers 304 for a matching ETag"""
+    response = await client.get("/")
+    etag = response.headers["etag"]
+    cached = await client.get("/", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_match_preview_with_dates(client: AsyncClient, test_catalog_file, test_request_data):
+    """Test match preview serializes date columns from uploaded files"""
+    import pandas as pd
+
+    files = {"file": ("catalog.xlsx", test_catalog_file, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+    catalog_id = (await client.post("/catalog/upload", files=files)).json()["catalog_id"]
+
+    test_request_data["Fecha"] = pd.Timestamp("2026-02-07")
+    buffer = io.BytesIO()
+    test_request_data.to_excel(buffer, index=False)
+    buffer.seek(0)
+    files = {"file": ("request.xlsx", buffer, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+    request_id = (await client.post("/request/upload", files=files)).json()["request_id"]
+
+    response = await client.post("/match", json={"catalog_id": catalog_id, "request_id": request_id})
+    assert response.status_code == 200
+    assert response.json()["preview"][0]["Fecha"].startswith("2026-02-07")